@@ -0,0 +1,20 @@
+"""
+svg.py is a single file module with no dependencies; this only builds the
+optional Cython-accelerated `svg_fast` extension, if Cython is installed:
+
+    python setup.py build_ext --inplace
+"""
+
+from setuptools import setup
+
+try:
+    from Cython.Build import cythonize
+    ext_modules = cythonize('svg_fast.pyx', language_level=3)
+except ImportError:
+    ext_modules = []
+
+setup(
+    name='py-svg',
+    py_modules=['svg'],
+    ext_modules=ext_modules,
+)
@@ -7,171 +7,293 @@ See: https://developer.mozilla.org/en-US/docs/Web/SVG
 """
 
 from contextlib import contextmanager
-from xml.etree import ElementTree
-from xml.etree.ElementTree import Element, SubElement, Comment
+
+try:
+    from lxml.etree import ElementTree, Element, SubElement, Comment, tostring
+    _LXML = True
+except ImportError:
+    # on Python 3.9+ (cElementTree is gone) this is transparently backed by the C `_elementtree` accelerator
+    from xml.etree.ElementTree import ElementTree, Element, SubElement, Comment, tostring
+    _LXML = False
 
 __all__ = 'SVG',
 
 
+_SVG_NS = 'http://www.w3.org/2000/svg'
+_XLINK_NS = 'http://www.w3.org/1999/xlink'
+_NS_PREFIXES = {'xml': 'http://www.w3.org/XML/1998/namespace', 'xlink': _XLINK_NS}
+
+_KEY_CACHE: dict[str, str] = {}  # kwarg name -> SVG attribute name, bounded by the SVG attribute vocabulary
+_INT_STR: dict[int, str] = {i: str(i) for i in range(-10, 1001)}  # small int coordinates recur throughout real documents
+
+
+def _attr_name(k):
+    """Translate a Python kwarg name to its SVG XML attribute name"""
+    nk = k.replace('_','-')
+    if _LXML and ':' in nk:
+        # lxml won't accept colon-prefixed attribute names, so namespaced attributes use Clark notation
+        prefix, _, local = nk.partition(':')
+        if prefix in _NS_PREFIXES: nk = '{%s}%s' % (_NS_PREFIXES[prefix], local)
+    return nk
+
+
+_XLINK_HREF = _attr_name('xlink:href')
+
+
+def _add(out, k, v, _i=_INT_STR, _s=str):
+    """Add a single SVG XML attribute to `out`, unless its value is None"""
+    if v is None: return
+    c = v.__class__
+    out[k] = v if c is str else (_i.get(v) or _s(v)) if c is int else _s(v)
+
+
+def _normalize_into(out, d, _c=_KEY_CACHE, _i=_INT_STR, _s=str):
+    """Normalize Python kwargs into the SVG XML attributes dict `out`"""
+    for k, v in d.items():
+        if v is None: continue
+        nk = _c.get(k)
+        if nk is None: nk = _c[k] = _attr_name(k)
+        c = v.__class__
+        out[nk] = v if c is str else (_i.get(v) or _s(v)) if c is int else _s(v)
+    return out
+
+
 def _normalize(d):
     """Normalize Python kwargs to SVG XML attributes"""
-    return {k.replace('_','-'):str(v) for k,v in d.items() if v is not None}
+    return _normalize_into({}, d)
+
+
+def _points(points):
+    """Format a sequence of (x,y) tuples as an SVG XML `points` attribute value"""
+    return ', '.join([f'{x} {y}' for x, y in points])
+
+
+def _viewbox(viewBox):
+    """Format a `viewBox` tuple as an SVG XML attribute value"""
+    if not viewBox:
+        return None
+    if len(viewBox) == 4:
+        return f'{viewBox[0]} {viewBox[1]} {viewBox[2]} {viewBox[3]}'
+    return ' '.join([str(x) for x in viewBox])
+
+
+try:
+    # optional Cython-compiled versions of the above hot helpers, see setup.py
+    from svg_fast import _normalize_into, _normalize, _points
+except ImportError:
+    pass
 
 
 class SVG:
     """A Scalable Vector Graphics (SVG) document builder"""
 
+    __slots__ = ('_root', '_parent', '_cache', '_cacheable')
+
     def __init__(self, width=None, height=None, preserveAspectRatio=None, viewBox:tuple=None, **kwargs):
-        attrs = {
-            'xmlns': 'http://www.w3.org/2000/svg',
-            'xmlns:xlink': "http://www.w3.org/1999/xlink",
-            'width': width, 'height': height, 'preserveAspectRatio': preserveAspectRatio,
-            'viewBox': ' '.join(str(x) for x in viewBox) if viewBox else None,
-            **kwargs,
-        }
-        self._root = Element('svg', _normalize(attrs))
-        self._stack = [self._root]
+        out = {} if _LXML else {'xmlns': _SVG_NS, 'xmlns:xlink': _XLINK_NS}
+        _add(out, 'width', width); _add(out, 'height', height)
+        _add(out, 'preserveAspectRatio', preserveAspectRatio)
+        _add(out, 'viewBox', _viewbox(viewBox))
+        if kwargs: _normalize_into(out, kwargs)
+        if _LXML:
+            self._root = Element('svg', out, nsmap={None: _SVG_NS, 'xlink': _XLINK_NS})
+        else:
+            self._root = Element('svg', out)
+        self._parent = self._root
+        self._cache = None  # serialized XML string, reset whenever the document changes
+        self._cacheable = True  # False once the tree may be modified behind our back, see `parent`
     
     @property
     def parent(self) -> Element:
-        """The current contextual parent element of the XML tree"""
-        return self._stack[-1]
+        """The current contextual parent element of the XML tree.
+
+        The returned element may be modified directly at any later time, so once this has been
+        accessed the document is re-serialized on every conversion to string rather than cached.
+        """
+        self._cacheable = False
+        return self._parent
     
     def line(self, p1:tuple, p2:tuple, stroke='black', **kwargs):
         """Basic shape used to create a line connecting two points."""
-        attrs = {
-            'x1': p1[0], 'y1': p1[1],
-            'x2': p2[0], 'y2': p2[1],
-            'stroke': stroke,
-            **kwargs,
-        }
-        SubElement(self.parent, 'line', _normalize(attrs))
+        self._cache = None
+        out = {}
+        _add(out, 'x1', p1[0]); _add(out, 'y1', p1[1])
+        _add(out, 'x2', p2[0]); _add(out, 'y2', p2[1])
+        _add(out, 'stroke', stroke)
+        if kwargs: _normalize_into(out, kwargs)
+        SubElement(self._parent, 'line', out)
+
+    def lines(self, segments:list[tuple], stroke='black', **kwargs):
+        """Batch of `line()` shapes, each given as a (p1, p2) pair of points, sharing the same attributes."""
+        self._cache = None
+        shared = {}
+        _add(shared, 'stroke', stroke)
+        if kwargs: _normalize_into(shared, kwargs)
+        parent = self._parent
+        for p1, p2 in segments:
+            out = {}
+            _add(out, 'x1', p1[0]); _add(out, 'y1', p1[1])
+            _add(out, 'x2', p2[0]); _add(out, 'y2', p2[1])
+            out.update(shared)
+            SubElement(parent, 'line', out)
 
     def rect(self, p:tuple, width=None, height=None, rx=None, ry=None, **kwargs):
         """Basic shape that draws rectangles, defined by their position, width, and height. The rectangles may have their corners rounded."""
-        attrs = {
-            'x': p[0], 'y': p[1],
-            'height': height,'width': width,
-            'rx': rx, 'ry': ry,
-            **kwargs,
-        }
-        SubElement(self.parent, 'rect', _normalize(attrs))
+        self._cache = None
+        out = {}
+        _add(out, 'x', p[0]); _add(out, 'y', p[1])
+        _add(out, 'height', height); _add(out, 'width', width)
+        _add(out, 'rx', rx); _add(out, 'ry', ry)
+        if kwargs: _normalize_into(out, kwargs)
+        SubElement(self._parent, 'rect', out)
     
     def circle(self, c:tuple, r, **kwargs):
         """Basic shape used to draw circles based on a center point and a radius."""
-        attrs = {
-            'cx': c[0], 'cy': c[1],
-            'r': r,
-            **kwargs,
-        }
-        SubElement(self.parent, 'circle', _normalize(attrs))
+        self._cache = None
+        out = {}
+        _add(out, 'cx', c[0]); _add(out, 'cy', c[1])
+        _add(out, 'r', r)
+        if kwargs: _normalize_into(out, kwargs)
+        SubElement(self._parent, 'circle', out)
     
-    def ellipse(self, c:tuple, rx=0, ry=0, **kwargs):
+    def circles(self, centers:list[tuple], r, **kwargs):
+        """Batch of `circle()` shapes, one per center point, sharing the same radius and attributes."""
+        self._cache = None
+        shared = {}
+        _add(shared, 'r', r)
+        if kwargs: _normalize_into(shared, kwargs)
+        parent = self._parent
+        for c in centers:
+            out = {}
+            _add(out, 'cx', c[0]); _add(out, 'cy', c[1])
+            out.update(shared)
+            SubElement(parent, 'circle', out)
+    
+    def ellipse(self, c:tuple, rx=None, ry=None, **kwargs):
         """Basic shape used to create ellipses based on a center coordinate, and both their x and y radius."""
-        attrs = {
-            'cx': c[0], 'cy': c[1],
-            'rx': rx, 'ry': ry,
-            **kwargs,
-        }
-        SubElement(self.parent, 'circle', _normalize(attrs))
+        self._cache = None
+        out = {}
+        _add(out, 'cx', c[0]); _add(out, 'cy', c[1])
+        _add(out, 'rx', rx); _add(out, 'ry', ry)
+        if kwargs: _normalize_into(out, kwargs)
+        SubElement(self._parent, 'ellipse', out)
     
     def polyline(self, points:list[tuple], **kwargs):
         """Basic shape that creates straight lines connecting several points."""
-        attrs = {
-            'points': ', '.join(('%s %s' % (x,y)) for (x,y) in points),
-            **kwargs,
-        }
-        SubElement(self.parent, 'polyline', _normalize(attrs))
+        self._cache = None
+        out = {'points': _points(points)}
+        if kwargs: _normalize_into(out, kwargs)
+        SubElement(self._parent, 'polyline', out)
 
     def polygon(self, points:list[tuple], **kwargs):
         """Basic closed shape consisting of a set of connected straight line segments. The last point is connected to the first point."""
-        attrs = {
-            'points': ', '.join(('%s %s' % (x,y)) for (x,y) in points),
-            **kwargs,
-        }
-        SubElement(self.parent, 'polygon', _normalize(attrs))
+        self._cache = None
+        out = {'points': _points(points)}
+        if kwargs: _normalize_into(out, kwargs)
+        SubElement(self._parent, 'polygon', out)
 
     def text(self, txt:str, p:tuple, **kwargs):
         """Graphics element consisting of text."""
-        attrs = {
-            'x': p[0], 'y': p[1],
-            **kwargs,
-        }
-        elem = SubElement(self.parent, 'text', _normalize(attrs))
+        self._cache = None
+        out = {}
+        _add(out, 'x', p[0]); _add(out, 'y', p[1])
+        if kwargs: _normalize_into(out, kwargs)
+        elem = SubElement(self._parent, 'text', out)
         elem.text = txt
 
     def path(self, d:str, **kwargs):
         """Generic element to define a shape. TODO."""
-        attrs = {
-            'd': d,
-            **kwargs,
-        }
-        SubElement(self.parent, 'path', _normalize(attrs))        
+        self._cache = None
+        out = {}
+        _add(out, 'd', d)
+        if kwargs: _normalize_into(out, kwargs)
+        SubElement(self._parent, 'path', out)
     
     def use(self, p:tuple, id:str, transform=None, **kwargs):
         """Takes nodes from within the SVG document, and duplicates them somewhere else."""
-        attrs = {
-            'x': p[0], 'y': p[1], 'transform': transform,
-            'xlink:href': id if '://' in id else id if id.startswith('#') else '#'+id,
-            **kwargs,
-        }
-        SubElement(self.parent, 'use', _normalize(attrs))
+        self._cache = None
+        out = {}
+        _add(out, 'x', p[0]); _add(out, 'y', p[1])
+        _add(out, 'transform', transform)
+        out[_XLINK_HREF] = id if id[:1] == '#' or '://' in id else '#'+id
+        if kwargs: _normalize_into(out, kwargs)
+        SubElement(self._parent, 'use', out)
 
     def style(self, d:dict, **kwargs):
         """Allows style sheets to be embedded directly within SVG content."""
-        elem = SubElement(self.parent, 'style', _normalize(kwargs))
+        self._cache = None
+        elem = SubElement(self._parent, 'style', _normalize(kwargs) if kwargs else {})
         def pretty(d, indent='  '):
-            lines = []
-            lines.append('')
+            i1 = indent; i2 = indent + indent
+            lines = ['']
+            ap = lines.append
             for key, value in d.items():
-                lines.append(indent + str(key) + ' {')
+                ap(f'{i1}{key} {{')
                 if isinstance(value, dict):
                     for key2, value2 in value.items():
-                        lines.append(indent*2 + '%s: %s;' % (key2, value2))
+                        ap(f'{i2}{key2}: {value2};')
                 else:
-                    lines.append(indent*2 + str(value))
-                lines.append(indent + '}')
-            lines.append('')
+                    ap(f'{i2}{value}')
+                ap(i1 + '}')
+            ap('')
             return '\n'.join(lines)
         elem.text = pretty(d)
     
     def comment(self, txt:str):
         """Inserts an XML comment into the SVG document."""
-        self.parent.append(Comment(' %s ' % txt))
+        if '--' in txt:
+            raise ValueError("Comment may not contain '--'")
+        self._cache = None
+        self._parent.append(Comment(f' {txt} '))
     
     @contextmanager
     def defs(self, **kwargs):
         """Used to store graphical objects that will be used at a later time."""
+        self._cache = None
+        old = self._parent
+        self._parent = SubElement(old, 'defs', _normalize(kwargs) if kwargs else {})
         try:
-            yield self._stack.append(SubElement(self.parent, 'defs', _normalize(kwargs)))
+            yield
         finally:
-            self._stack.pop()
+            self._parent = old
     
     @contextmanager
     def group(self, id:str, title:str=None, desc:str=None, **kwargs):
         """Container used to group other SVG elements."""
-        attrs = {
-            'id': id, 'title': title, 'desc': desc,
-            **kwargs,
-        }
+        self._cache = None
+        out = {}
+        _add(out, 'id', id); _add(out, 'title', title); _add(out, 'desc', desc)
+        old = self._parent
+        if kwargs: _normalize_into(out, kwargs)
+        self._parent = SubElement(old, 'g', out)
         try:
-            yield self._stack.append(SubElement(self.parent, 'g', _normalize(attrs)))
+            yield
         finally:
-            self._stack.pop()
+            self._parent = old
 
     @contextmanager
     def symbol(self, id:str, width=None, height=None, viewBox:tuple=None, **kwargs):
         """Container used to define graphical template objects which can be instantiated by a <use> element."""
-        attrs = {
-            'id': id, 'width': width, 'height': height,
-            'viewBox': ' '.join(str(x) for x in viewBox) if viewBox else None,
-            **kwargs,
-        }
+        self._cache = None
+        out = {}
+        _add(out, 'id', id); _add(out, 'width', width); _add(out, 'height', height)
+        _add(out, 'viewBox', _viewbox(viewBox))
+        old = self._parent
+        if kwargs: _normalize_into(out, kwargs)
+        self._parent = SubElement(old, 'symbol', out)
         try:
-            yield self._stack.append(SubElement(self.parent, 'symbol', _normalize(attrs)))
+            yield
         finally:
-            self._stack.pop()
+            self._parent = old
+
+    def write(self, fp):
+        """Streams the SVG document as UTF-8 XML to a binary file-like object, without building it as a string first."""
+        ElementTree(self._root).write(fp, encoding='utf-8', xml_declaration=True)
 
     def __str__(self):
         """Renders the SVG document to XML string."""
-        return str(ElementTree.tostring(self._root, 'utf-8'), 'utf-8')
+        if not self._cacheable:
+            return tostring(self._root, encoding='utf-8', xml_declaration=False).decode('utf-8')
+        if self._cache is None:
+            self._cache = tostring(self._root, encoding='utf-8', xml_declaration=False).decode('utf-8')
+        return self._cache
@@ -0,0 +1,56 @@
+# cython: language_level=3
+"""
+Optional Cython-compiled versions of the hot attribute-building helpers in svg.py
+
+Build in-place with `python setup.py build_ext --inplace`; svg.py falls back to
+its pure-Python implementations when this extension isn't available.
+"""
+
+try:
+    # same backend choice as svg.py, which decides how namespaced attribute names are spelled
+    import lxml.etree
+    _LXML = True
+except ImportError:
+    _LXML = False
+
+cdef dict _NS_PREFIXES = {'xml': 'http://www.w3.org/XML/1998/namespace', 'xlink': 'http://www.w3.org/1999/xlink'}
+cdef dict _KEY_CACHE = {}  # kwarg name -> SVG attribute name, bounded by the SVG attribute vocabulary
+cdef dict _INT_STR = {i: str(i) for i in range(-10, 1001)}  # small int coordinates recur throughout real documents
+
+
+cdef str _attr_name(str k):
+    """Translate a Python kwarg name to its SVG XML attribute name, as svg._attr_name()"""
+    cdef str nk = k.replace('_','-')
+    if _LXML and ':' in nk:
+        prefix, _, local = nk.partition(':')
+        if prefix in _NS_PREFIXES: nk = '{%s}%s' % (_NS_PREFIXES[prefix], local)
+    return nk
+
+
+cdef inline str _key(str k):
+    """Translate a Python kwarg name to its SVG XML attribute name"""
+    nk = _KEY_CACHE.get(k)
+    if nk is None:
+        nk = _KEY_CACHE[k] = _attr_name(k)
+    return <str>nk
+
+
+cpdef dict _normalize_into(dict out, dict d):
+    """Normalize Python kwargs into the SVG XML attributes dict `out`"""
+    cdef str k
+    for k, v in d.items():
+        if v is None:
+            continue
+        c = type(v)
+        out[_key(k)] = v if c is str else (_INT_STR.get(v) or str(v)) if c is int else str(v)
+    return out
+
+
+cpdef dict _normalize(dict d):
+    """Normalize Python kwargs to SVG XML attributes"""
+    return _normalize_into({}, d)
+
+
+cpdef str _points(points):
+    """Format a sequence of (x,y) tuples as an SVG XML `points` attribute value"""
+    return ', '.join([f'{x} {y}' for x, y in points])